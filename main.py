@@ -1,118 +1,172 @@
 #!/usr/bin/python3
 import re
 import requests
-import textwrap
 import time
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 from rich.progress import Progress
-from formatter import Formatter
-from bs4 import BeautifulSoup
+from formatter import formatter
+from bs4 import BeautifulSoup, SoupStrainer
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 
 # Constants
 BASE_URL = "https://vlr.gg"
+MAX_WORKERS = 10
+MAX_RETRIES = 3
+MAX_RETRY_AFTER = 5  # Seconds
+REQUEST_TIMEOUT = 10  # Seconds
+EVENT_LINKS_TTL = 60  # Seconds
+EVENT_URLS = {
+    "1": f"{BASE_URL}//event/matches/2274/champions-tour-2025-americas-kickoff/?series_id=4405",
+    "2": f"{BASE_URL}/event/matches/2276/champions-tour-2025-emea-kickoff/?series_id=4407",
+    "3": f"{BASE_URL}/event/matches/2277/champions-tour-2025-pacific-kickoff/?series_id=4408",
+    "4": f"{BASE_URL}/event/matches/2275/champions-tour-2025-china-kickoff/?series_id=4406",
+}
+ANCHOR_STRAINER = SoupStrainer("a", href=True)  # Event pages only need their links
+MATCH_CODES = ("427", "428", "429", "430", "431")
+MATCH_CODE_PATTERN = re.compile("|".join(map(re.escape, MATCH_CODES)))
+NOT_STARTED = "Match has not started yet."
+SCORE_COLON_PATTERN = re.compile(r"\s*:\s*")
+SEPARATOR = "-" * 100
+MENU_OPTIONS = (
+    "VCT 25: Americas Kickoff",
+    "VCT 25: EMEA Kickoff",
+    "VCT 25: APAC Kickoff",
+    "VCT 25: China Kickoff",
+    "Exit",
+)
+MENU = "\n".join(
+    ["Regions:", *(f"{i}. {option}" for i, option in enumerate(MENU_OPTIONS, start=1))]
+) + "\n\n"
+LIVE_STATUS = formatter.format("In Progress", "red")
+IDLE_STATUS = formatter.format("", "red")
+
+class CappedRetry(Retry):  # Honouring Retry-After, but never sleeping longer than MAX_RETRY_AFTER
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, MAX_RETRY_AFTER)
+
+
+# Shared session so every worker thread reuses pooled keep-alive connections
+retries = CappedRetry(
+    total=MAX_RETRIES, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504)
+)
+session = requests.Session()
+session.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS, max_retries=retries
+    ),
+)
+
+# Output for matches the page marks as final, keyed by match URL; their results never change
+completed_matches = {}
+# Match links per event URL as (fetched_at, links), reused for EVENT_LINKS_TTL seconds
+event_links = {}
 
 print("\nValorant Champions Tour 25\n")
 
 
 # Functions
 def menu():  # Displays the menu and returns the user choice
-    options = [
-        "VCT 25: Americas Kickoff",
-        "VCT 25: EMEA Kickoff",
-        "VCT 25: APAC Kickoff",
-        "VCT 25: China Kickoff",
-        "Exit",
-    ]
-    print("Regions:")
-    for i, option in enumerate(options, start=1):
-        print(f"{i}. {option}")
-    print("\n")
+    print(MENU)
     choice = input("\nWhich matches would you like to see results for: ")
     return choice.strip()
 
 
 def get_event_url(choice):  # Returns the URL for the user selected event
-    event_urls = {
-        "1": f"{BASE_URL}//event/matches/2274/champions-tour-2025-americas-kickoff/?series_id=4405",
-        "2": f"{BASE_URL}/event/matches/2276/champions-tour-2025-emea-kickoff/?series_id=4407",
-        "3": f"{BASE_URL}/event/matches/2277/champions-tour-2025-pacific-kickoff/?series_id=4408",
-        "4": f"{BASE_URL}/event/matches/2275/champions-tour-2025-china-kickoff/?series_id=4406",
-    }
-    if choice in event_urls:  # Checking if the user input is valid
-        return event_urls[choice]
+    if choice in EVENT_URLS:  # Checking if the user input is valid
+        return EVENT_URLS[choice]
     elif choice == "5":
-        print(Formatter().format("\nExiting...\n", "red"))
+        print(formatter.format("\nExiting...\n", "red"))
         exit()
     else:
         return None
 
 
-def fetch_and_parse(url):  # Fetches the page content and parses it
-    response = requests.get(url)
-    if response.status_code == 200:
-        return BeautifulSoup(response.content, "html.parser")
-    else:
-        response.raise_for_status()
+def fetch_and_parse(url, parse_only=None):  # Fetches the page content and parses it
+    response = session.get(url, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return BeautifulSoup(response.content, "lxml", parse_only=parse_only)
 
 
 def extract_match_links(soup):  # Extracts the match links from the page
     return [
-        link
+        link["href"]
         for link in soup.find_all("a", href=True)
-        if any(code in link["href"] for code in ("427", "428", "429", "430", "431"))
+        if MATCH_CODE_PATTERN.search(link["href"])
     ]
 
-# Extracts the team names and scores from the match pages
-def extract_teams_and_scores(match_url,):  
-    soup = fetch_and_parse(match_url)
-    teams = [team.text.strip() for team in soup.find_all("div", class_="wf-title-med")][
-        :2
+
+def get_match_links(event_url):  # Returns the event's match links, reusing a recent fetch
+    cached = event_links.get(event_url)
+    if cached is not None and time.monotonic() - cached[0] < EVENT_LINKS_TTL:
+        return cached[1]
+
+    match_links = extract_match_links(fetch_and_parse(event_url, ANCHOR_STRAINER))
+    event_links[event_url] = (time.monotonic(), match_links)
+    return match_links
+
+
+# Extracts the team names from the match pages, or None while the matchup is still TBD
+def extract_teams(soup):
+    teams = [  # Removing the trailing parenthetical from team names to make output more readable
+        team.text.partition("(")[0].strip()
+        for team in soup.find_all("div", class_="wf-title-med", limit=2)
     ]
+    if "TBD" in teams:
+        return None
+    return teams
+
+
+def extract_score(soup):  # Extracts the score and live status from the match pages
     try:
         score = soup.find("div", class_="js-spoiler").text.strip()
     except AttributeError:
-        score = "Match has not started yet."
+        score = NOT_STARTED
 
-    is_live = soup.find("span", class_="match-header-vs-note mod-live")  # Checking if the match is in progress
-    formatted_score = re.sub(r"\s*:\s*", ":", score)  # Cleaning up the score format
-    teams = [re.sub(r'\s*\(.*?\)\s*', '', team) for team in teams] # Removing parentheses from team names to make output more readable
-    return teams, formatted_score, is_live
+    is_live = soup.select_one(".match-header-vs-note.mod-live")  # Checking if the match is in progress
+    formatted_score = SCORE_COLON_PATTERN.sub(":", score)  # Cleaning up the score format
+    return formatted_score, is_live
 
 
-def extract_date(soup):  # Extracts the date of the matches from the match pages
-    match_date = soup.find("div", class_="moment-tz-convert").text.strip()
-    match_time = (
-        soup.find("div", class_="moment-tz-convert").find_next("div").text.strip()
+def is_finished(soup):  # Checking the header note reads "final" before treating the result as settled
+    return any(
+        note.text.strip().lower() == "final"
+        for note in soup.select(".match-header-vs-note")
     )
+
+
+def extract_date(soup):  # Extracts the date of the matches from the match pages
+    date_div = soup.find("div", class_="moment-tz-convert")
+    match_date = date_div.text.strip()
+    match_time = date_div.find_next("div").text.strip()
     return match_date, match_time
 
-def process_match(link): # Processes the match page 
-    match_url = BASE_URL + link["href"]
+def process_match(href): # Processes the match page
+    match_url = BASE_URL + href
     match_soup = fetch_and_parse(match_url)
-    if match_soup is None:
-        return Formatter().format("Failed to fetch match data", "red")
-
-    teams, formatted_score, is_live = extract_teams_and_scores(match_url)
-    if "TBD" in teams:
+    header = match_soup.find("div", class_="match-header") or match_soup  # Searching only the header where every field lives
+    teams = extract_teams(header)
+    if teams is None:
         return None
 
-    match_date, match_time = extract_date(match_soup)
-    match_link = BASE_URL + link["href"]
-    output = format_output(match_date, match_time, teams, formatted_score, match_link, is_live)
-    
+    formatted_score, is_live = extract_score(header)
+    match_date, match_time = extract_date(header)
+    output = format_output(match_date, match_time, teams, formatted_score, match_url, is_live)
+    if is_finished(header):
+        completed_matches[match_url] = output
+
     return output
 
 def format_output(match_date, match_time, teams, formatted_score, match_link, is_live): # Formats the output for each match
-    status = "In Progress" if is_live else ""
-    output = textwrap.dedent(
-        f"""
-        {Formatter().format(f"{match_date}  {match_time}", "white")} | {Formatter().format(f"{teams[0]} vs {teams[1]}", "white")} | Score: {Formatter().format(f"{formatted_score}", "green")} {Formatter().format(status, "red")}
-        {Formatter().format(f"Stats: {match_link}", "cyan")}
-        {'-' * 100}
-        """
-    )
-    return output
+    status = LIVE_STATUS if is_live else IDLE_STATUS
+    header = f"{formatter.format(f'{match_date}  {match_time}', 'white')} | {formatter.format(f'{teams[0]} vs {teams[1]}', 'white')} | Score: {formatter.format(formatted_score, 'green')} {status}"
+    stats = formatter.format(f"Stats: {match_link}", "cyan")
+    return f"\n{header}\n{stats}\n{SEPARATOR}\n"
 
 
 def main():
@@ -123,36 +177,38 @@ def main():
 
         event_url = get_event_url(selected_option)
         if not event_url:
-            print(Formatter().format("\nInvalid choice. Try again.\n", "red"))
-            continue
-
-        event_soup = fetch_and_parse(event_url)
-        if event_soup is None:
-            print(Formatter().format("\Error fetching event data. Try again later.\n", "red"))
+            print(formatter.format("\nInvalid choice. Try again.\n", "red"))
             continue
 
-        match_links = extract_match_links(event_soup)
+        match_links = get_match_links(event_url)
         if not match_links:
-            print(Formatter().format("\nNo matches found for the selected event\n", "red"))
+            print(formatter.format("\nNo matches found for the selected event\n", "red"))
             continue
 
-        with ThreadPoolExecutor(max_workers=10) as executor:  # Using multiple threads to process the matches
-            futures_to_link = {
-                executor.submit(process_match, link): link for link in match_links
+        results = []
+        pending_links = []
+        for i, link in enumerate(match_links):  # Reusing finished matches before fetching the rest
+            cached = completed_matches.get(BASE_URL + link)
+            if cached is not None:
+                results.append((i, cached))
+            else:
+                pending_links.append((i, link))
+
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:  # Using multiple threads to process the matches
+            futures_to_index = {
+                executor.submit(process_match, link): i for i, link in pending_links
             }
-            results = []
 
             with Progress() as progress:  # Displaying a progress bar
-                task = progress.add_task("[magenta]Getting match results", total=len(futures_to_link))
+                task = progress.add_task("[magenta]Getting match results", total=len(futures_to_index))
 
-                for future in as_completed(futures_to_link):
+                for future in as_completed(futures_to_index):
                     result = future.result()
                     if result is not None:
-                        results.append((futures_to_link[future], result))
+                        results.append((futures_to_index[future], result))
                     progress.update(task, advance=1)
-                    time.sleep(0.5)
 
-            sorted_results = sorted(results, key=lambda x: match_links.index(x[0]))  # Sorting the results
+            sorted_results = sorted(results)  # Sorting the results back into page order
 
             for _, result in sorted_results:
                 print(result)